@@ -1,17 +1,265 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+import functools
+import logging
+import time
+from typing import Iterable, Iterator, final
+
+from sqlalchemy import DateTime, and_, bindparam, delete, func, select, tuple_, update
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.dialects.sqlite import insert
+
 from models import LandRecord
 
 
+logger = logging.getLogger(__name__)
+
+
+def _column_expression(column):
+    """
+    Return the select expression for a column, with timestamps formatted like LandRecord.to_dict().
+    """
+    if isinstance(column.type, DateTime):
+        return func.strftime('%Y-%m-%d %H:%M:%S', column).label(column.key)
+    return column
+
+
+# Plain columns to select instead of hydrating LandRecord objects, in to_dict() order
+_RECORD_COLUMNS = {column.key: _column_expression(column) for column in LandRecord.__table__.columns}
+
+# Columns of the composite index on land_records, in index order
+_INDEX_ORDER = ('district_name', 'tehsil_name', 'villege_name', 'khasra_no')
+
+# Size and lifetime in seconds of the per-instance read caches of LandRecordCRUD
+_CACHE_SIZE = 4096
+_CACHE_TTL = 300
+
+# Largest page search() returns
+_MAX_PAGE_SIZE = 1000
+
+# Number of rows fetched per round trip when search() streams
+_STREAM_CHUNK_SIZE = 1000
+
+# Keys per IN (...) list when create_records_bulk() reads its records back, well under
+# SQLite's bound parameter limit at four parameters per key
+_BULK_KEY_CHUNK_SIZE = 500
+
+# Statements are built once at import and executed with bound parameters, so
+# SQLAlchemy's compiled cache and the driver's statement cache are hit on every call.
+_UPDATE_BY_ID = update(LandRecord).where(LandRecord.id == bindparam('record_id'))
+_DELETE_BY_ID = delete(LandRecord).where(LandRecord.id == bindparam('record_id'))
+# Columns of the unique idx_district_tehsil_village_khasra index
+_KEY_COLUMNS = (LandRecord.district_name, LandRecord.tehsil_name,
+                LandRecord.villege_name, LandRecord.khasra_no)
+
+_INPUT_DATA_CRITERIA = and_(
+    LandRecord.district_name == bindparam('district_name'),
+    LandRecord.tehsil_name == bindparam('tehsil_name'),
+    LandRecord.villege_name == bindparam('villege_name'),
+    LandRecord.khasra_no == bindparam('khasra_no'),
+)
+_SEARCH_BY_INPUT_DATA = select(*_RECORD_COLUMNS.values()).where(_INPUT_DATA_CRITERIA)
+
+
+def _compile_raw(statement) -> tuple:
+    """
+    Compile a statement to SQLite SQL text, returning the SQL, its positional parameter names and its fixed parameters.
+    """
+    compiled = statement.compile(dialect=sqlite.dialect())
+    return compiled.string, compiled.positiontup, compiled.params
+
+
+# Hot read paths that skip the ORM and the SQLAlchemy result layer entirely
+_RAW_READ_BY_ID = _compile_raw(
+    select(*_RECORD_COLUMNS.values()).where(LandRecord.id == bindparam('record_id')))
+_RAW_SEARCH_BY_INPUT_DATA = _compile_raw(_SEARCH_BY_INPUT_DATA)
+_RAW_FIND_BY_INPUT_DATA = _compile_raw(_SEARCH_BY_INPUT_DATA.limit(1))
+
+
+def _select_fields(fields: list|None=None):
+    """
+    Return a select over the requested record fields, or all of them if fields is None.
+    """
+    if fields is None:
+        return select(*_RECORD_COLUMNS.values())
+    unknown = [field for field in fields if field not in _RECORD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown LandRecord fields: {', '.join(unknown)}.")
+    return select(*(_RECORD_COLUMNS[field] for field in fields))
+
+
+def _ordered_filter_names(filters: dict) -> tuple:
+    """
+    Return the filter names with the _INDEX_ORDER columns first, warning when a leading index column is skipped.
+    """
+    present = [name for name in _INDEX_ORDER if name in filters]
+    # Filters on id are primary key lookups; filters on no index column never used the index
+    if 'id' not in filters and present and present != list(_INDEX_ORDER[:len(present)]):
+        logger.warning(
+            "Searching by %s skips a leading column of the (%s) index; the index is only "
+            "used up to the first missing column and the rest is filtered by a scan.",
+            ', '.join(filters), ', '.join(_INDEX_ORDER))
+    return tuple(present) + tuple(sorted(name for name in filters if name not in _INDEX_ORDER))
+
+
+@functools.lru_cache(maxsize=128)
+def _search_statement(filter_names: tuple, fields: tuple|None, paginated: bool):
+    """
+    Build the search statement for one combination of filters, fields and pagination.
+    """
+    query = _select_fields(fields).where(
+        *(LandRecord.__table__.c[name] == bindparam(name) for name in filter_names))
+    if paginated:
+        query = query.order_by(LandRecord.id).limit(bindparam('limit')).offset(bindparam('offset'))
+    return query
+
+
+def _upsert_statement(columns: Iterable[str], force_refresh: bool=False):
+    """
+    Build an INSERT ... ON CONFLICT on the unique district/tehsil/village/khasra index.
+    """
+    stmt = insert(LandRecord)
+    if force_refresh:
+        return stmt.on_conflict_do_update(
+            index_elements=_KEY_COLUMNS,
+            set_={**{column: stmt.excluded[column] for column in columns}, 'updated_at': func.now()})
+    return stmt.on_conflict_do_nothing(index_elements=_KEY_COLUMNS)
+
+
+def _readonly(method):
+    """
+    Decorator running a read-only LandRecordCRUD method with autoflush disabled.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.session.no_autoflush:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _cache_get(cache: OrderedDict, key):
+    """
+    Return the cached value for key, or None if it is missing or older than _CACHE_TTL.
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at < time.monotonic():
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value) -> None:
+    """
+    Cache value under key, evicting the least recently used entry past _CACHE_SIZE.
+    """
+    cache[key] = (time.monotonic() + _CACHE_TTL, value)
+    cache.move_to_end(key)
+    if len(cache) > _CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+@final
 class LandRecordCRUD:
+    """
+    CRUD operations for LandRecord.
+
+    Methods only flush their changes; the caller commits, e.g. with transaction() or a
+    session.begin() block. Reads are cached per instance, so an instance should not
+    outlive its session.
+    """
+    __slots__ = ('session', '_record_cache', '_lookup_cache', '_pending', '_batch_size')
+
     def __init__(self, session):
         self.session = session
+        self._record_cache = OrderedDict()  # record id -> record dict
+        self._lookup_cache = OrderedDict()  # (district, tehsil, villege, khasra) -> records
+        self._pending = None  # (data, force_refresh) pairs buffered by batch()
+        self._batch_size = 0
+
+    def clear_cache(self) -> None:
+        """
+        Drop every cached read.
+        """
+        self._record_cache.clear()
+        self._lookup_cache.clear()
+
+    def _invalidate(self, record_id: int|None=None, key: tuple|None=None) -> None:
+        """
+        Drop cached reads made stale by a write; without a key all lookups are dropped.
+        """
+        if record_id is not None:
+            self._record_cache.pop(record_id, None)
+        if key is not None:
+            self._lookup_cache.pop(key, None)
+        else:
+            self._lookup_cache.clear()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Commit everything done inside the block once on success, roll back on error.
+        """
+        try:
+            yield self
+        except Exception:
+            self.session.rollback()
+            self.clear_cache()
+            raise
+        else:
+            self.session.commit()
+
+    @contextmanager
+    def batch(self, size: int=500):
+        """
+        Buffer create_record_by_checking_record() calls made inside the block, write them in batches of size and commit once at the end.
+        """
+        autoflush = self.session.autoflush
+        self.session.autoflush = False
+        self._pending = []
+        self._batch_size = size
+        try:
+            with self.transaction():
+                yield self
+                self._flush_pending()
+        finally:
+            self.session.autoflush = autoflush
+            self._pending = None
+
+    def _flush_pending(self) -> None:
+        """
+        Write the rows buffered by batch(), one statement per force_refresh value.
+        """
+        pending, self._pending = self._pending, []
+        for force_refresh in (False, True):
+            rows = [data for data, refresh in pending if refresh is force_refresh]
+            if not rows:
+                continue
+            rows.sort(key=lambda data: tuple(data[column.key] for column in _KEY_COLUMNS))
+            self.session.execute(_upsert_statement(rows[0], force_refresh), rows)
+        if pending:
+            self.clear_cache()
+
+    def commit_every(self, items: Iterable, n: int=500) -> Iterator:
+        """
+        Yield items back to the caller, committing after every n of them and once at the end.
+        """
+        for count, item in enumerate(items, start=1):
+            yield item
+            if count % n == 0:
+                self.session.commit()
+        self.session.commit()
 
     def create_record(self, **kwargs):
         """
-        Create a new LandRecord record.
+        Create a new LandRecord record (flushed, not committed).
         """
         record = LandRecord(**kwargs)
         self.session.add(record)
-        self.session.commit()
+        self.session.flush()
         return record.to_dict()
     
     def create_record_by_checking_record(
@@ -19,73 +267,204 @@ class LandRecordCRUD:
         khasra_no: str, data: dict, force_refresh: bool=False) -> dict:
         """
         Create a new LandRecord record if the query for district_name, tehsil_name, villege_name, khasra_no will return empty or None.
+
+        With force_refresh an existing record is overwritten with data.
         """
-        nakal_data = self.search_records_by_input_data(
-            district_name=district_name, tehsil_name=tehsil_name,
-            villege_name=villege_name, khasra_no=khasra_no
-            )
-        if nakal_data:
-            nakal_data = nakal_data[0]
-        if nakal_data and not force_refresh:
-            return nakal_data
-        elif nakal_data and force_refresh:
-            return self.update_record(record_id=nakal_data['id'], data=data)
-        record = LandRecord(**data)
-        self.session.add(record)
-        self.session.commit()
-        return record.to_dict()
+        if self._pending is not None:
+            self._pending.append((data, bool(force_refresh)))
+            if len(self._pending) >= self._batch_size:
+                self._flush_pending()
+            return dict(data)
+        if not force_refresh:
+            record = self.find_record(
+                district_name=district_name, tehsil_name=tehsil_name,
+                villege_name=villege_name, khasra_no=khasra_no)
+            if record is not None:
+                return record
+        changed = self.session.execute(_upsert_statement(data, force_refresh), data).rowcount
+        # The record is stored under the key in data, which may differ from the arguments
+        key = tuple(data.get(column.key, value) for column, value in zip(
+            _KEY_COLUMNS, (district_name, tehsil_name, villege_name, khasra_no)))
+        if changed:
+            self._invalidate(key=key)
+        record = self.find_record(*key)
+        if changed:
+            self._invalidate(record_id=record['id'])
+        return record
+
+    def create_records_bulk(self, items: list[tuple[dict, dict]], 
+                            force_refresh: bool=False) -> list:
+        """
+        Create many LandRecord records from (keys, data) pairs (not committed).
+
+        With force_refresh existing records are overwritten with data.
+        """
+        if not items:
+            return []
+        # Last item wins when the same key shows up more than once
+        items_by_key = {
+            (keys['district_name'], keys['tehsil_name'], keys['villege_name'], keys['khasra_no']): data
+            for keys, data in items
+        }
+        keys = sorted(items_by_key)
+        rows = [items_by_key[key] for key in keys]
+        self.session.execute(_upsert_statement(rows[0], force_refresh), rows)
+        self.clear_cache()
 
-    def read_record(self, record_id: int) -> dict:
+        key_columns = tuple_(*_KEY_COLUMNS)
+        records = []
+        for start in range(0, len(keys), _BULK_KEY_CHUNK_SIZE):
+            chunk = keys[start:start + _BULK_KEY_CHUNK_SIZE]
+            records.extend(map(dict, self.session.execute(
+                _select_fields().where(key_columns.in_(chunk))).mappings()))
+        return records
+
+    def _execute_raw(self, raw_statement: tuple, params: dict) -> list:
+        """
+        Run a statement prepared by _compile_raw() on the session's DBAPI connection.
+        """
+        sql, param_names, fixed_params = raw_statement
+        params = {**fixed_params, **params}
+        cursor = self.session.connection().connection.cursor()
+        try:
+            cursor.execute(sql, [params[name] for name in param_names])
+            column_names = [column[0] for column in cursor.description]
+            return [dict(zip(column_names, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    @_readonly
+    def read_record(self, record_id: int, use_orm: bool=False) -> dict:
         """
         Read a LandRecord record by its ID.
         """
-        data = self.session.query(LandRecord).filter_by(id=record_id).first()
+        if not use_orm:
+            record = _cache_get(self._record_cache, record_id)
+            if record is None:
+                rows = self._execute_raw(_RAW_READ_BY_ID, {'record_id': record_id})
+                if not rows:
+                    return {}
+                record = rows[0]
+                _cache_put(self._record_cache, record_id, record)
+            return dict(record)
+        data = self.session.get(LandRecord, record_id)
         return data.to_dict() if data else {}
 
-    def update_record(self, record_id: int, data: dict) -> dict|None:
+    def update_record(self, record_id: int, data: dict, 
+                      return_record: bool=True) -> dict|bool|None:
         """
-        Update a LandRecord record by its ID.
+        Update a LandRecord record by its ID (not committed).
+
+        Returns the updated record, or None if no record matched; a bool with return_record=False.
         """
-        record = self.session.query(LandRecord).filter_by(id=record_id).first()
-        if record:
-            for key, value in data.items():
-                setattr(record, key, value)
-            self.session.commit()
-            return record.to_dict()
-        return None
+        result = self.session.execute(_UPDATE_BY_ID.values(**data), {'record_id': record_id})
+        self._invalidate(record_id=record_id)
+        if not return_record:
+            return result.rowcount > 0
+        if not result.rowcount:
+            return None
+        return self.read_record(record_id=record_id)
 
-    def delete_record(self, record_id: id) -> bool:
+    def delete_record(self, record_id: int) -> bool:
         """
-        Delete a LandRecord record by its ID.
+        Delete a LandRecord record by its ID with a single DELETE statement (not committed).
         """
-        record = self.session.query(LandRecord).filter_by(id=record_id).first()
-        if record:
-            self.session.delete(record)
-            self.session.commit()
-            return True
-        return False
-
-    def search_records(self, district_name: str=None, 
-                       tehsil_name: str=None, villege_name: str=None) -> list:
-        """
-        Search LandRecord records based on provided criteria.
-        """
-        query = self.session.query(LandRecord)
-        if district_name:
-            query = query.filter_by(district_name=district_name)
-        if tehsil_name:
-            query = query.filter_by(tehsil_name=tehsil_name)
-        if villege_name:
-            query = query.filter_by(villege_name=villege_name)
-        data = query.all()
-        return [item.to_dict() for item in data] if data else []
+        result = self.session.execute(_DELETE_BY_ID, {'record_id': record_id})
+        self._invalidate(record_id=record_id)
+        return result.rowcount > 0
+
+    @_readonly
+    def search(self, *, fields: list|None=None, limit: int|None=None, offset: int=0,
+               stream: bool=False, **filters) -> list|Iterator[dict]:
+        """
+        Search LandRecord records by equality on the columns given as keyword arguments.
+
+        Needs at least one filter or a limit (at most _MAX_PAGE_SIZE); with stream=True an iterator is returned.
+        """
+        filters = {name: value for name, value in filters.items() if value is not None}
+        unknown = [name for name in filters if name not in LandRecord.__table__.c]
+        if unknown:
+            raise ValueError(f"Unknown LandRecord filters: {', '.join(unknown)}.")
+        if not filters and limit is None:
+            raise ValueError("Provide at least one filter or a limit to search records.")
+        if limit is not None and not 0 < limit <= _MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {_MAX_PAGE_SIZE}.")
+        paginated = limit is not None or bool(offset)
+        statement = _search_statement(
+            _ordered_filter_names(filters), None if fields is None else tuple(fields), paginated)
+        params = filters
+        if paginated:
+            # SQLite treats a negative LIMIT as no limit
+            params = {**filters, 'limit': -1 if limit is None else limit, 'offset': offset}
+        rows = self.session.execute(statement, params).mappings()
+        if stream:
+            return map(dict, rows.yield_per(_STREAM_CHUNK_SIZE))
+        return list(map(dict, rows))
+
+    def search_records(self, district_name: str=None, tehsil_name: str=None, 
+                       villege_name: str=None, fields: list|None=None, 
+                       limit: int|None=None, offset: int=0,
+                       stream: bool=False) -> list|Iterator[dict]:
+        """
+        Search LandRecord records based on provided criteria, see search().
+        """
+        return self.search(
+            district_name=district_name or None, tehsil_name=tehsil_name or None,
+            villege_name=villege_name or None, fields=fields, limit=limit, offset=offset,
+            stream=stream)
+
+    def iter_search_records(self, district_name: str=None, tehsil_name: str=None, 
+                            villege_name: str=None, fields: list|None=None,
+                            limit: int|None=None, offset: int=0) -> Iterator[dict]:
+        """
+        Yield LandRecord records matching the provided criteria one by one, see search().
+        """
+        return self.search_records(
+            district_name=district_name, tehsil_name=tehsil_name, villege_name=villege_name,
+            fields=fields, limit=limit, offset=offset, stream=True)
     
+    @_readonly
     def search_records_by_input_data(self, district_name: str, tehsil_name: str, 
-                                    villege_name: str, khasra_no: str) -> list:
+                                    villege_name: str, khasra_no: str, 
+                                    fields: list|None=None, use_orm: bool=False) -> list:
         """
         Read all LandRecord record by district_name, tehsil_name, villege_name and khasra_no.
+
+        With use_orm the records are loaded as LandRecord objects through the session.
+        """
+        params = {'district_name': district_name, 'tehsil_name': tehsil_name,
+                  'villege_name': villege_name, 'khasra_no': khasra_no}
+        if use_orm:
+            records = [record.to_dict() for record in self.session.execute(
+                select(LandRecord).filter_by(**params)).scalars()]
+            if fields is None:
+                return records
+            _select_fields(fields)  # Raises ValueError for unknown fields
+            return [{field: record[field] for field in fields} for record in records]
+        if fields is None:
+            key = (district_name, tehsil_name, villege_name, khasra_no)
+            records = _cache_get(self._lookup_cache, key)
+            if records is None:
+                records = self._execute_raw(_RAW_SEARCH_BY_INPUT_DATA, params)
+                if not records:
+                    return []
+                _cache_put(self._lookup_cache, key, records)
+            return list(map(dict, records))
+        return self.search(fields=fields, **params)
+
+    @_readonly
+    def find_record(self, district_name: str, tehsil_name: str, 
+                    villege_name: str, khasra_no: str) -> dict|None:
+        """
+        Read the LandRecord record for district_name, tehsil_name, villege_name and khasra_no, or None.
         """
-        data = self.session.query(LandRecord).filter_by(
-            district_name=district_name, tehsil_name=tehsil_name, 
-            villege_name=villege_name, khasra_no=khasra_no).all()
-        return [item.to_dict() for item in data] if data else []
+        key = (district_name, tehsil_name, villege_name, khasra_no)
+        records = _cache_get(self._lookup_cache, key)
+        if records is None:
+            records = self._execute_raw(_RAW_FIND_BY_INPUT_DATA, {
+                'district_name': district_name, 'tehsil_name': tehsil_name,
+                'villege_name': villege_name, 'khasra_no': khasra_no})
+            if not records:
+                return None
+            _cache_put(self._lookup_cache, key, records)
+        return dict(records[0])
@@ -1,26 +1,267 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
 from pathlib import Path
 import argparse
+import functools
+import hashlib
 import json
+import logging
+import operator
+import re
 import time
 import sys
 import traceback
+from typing import Iterable, Iterator, Sequence
 
+import lxml.html
 import requests
-import scrapy
-import pandas as pd
-from requests.exceptions import RequestException
+from lxml import etree
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from land_record_crud import LandRecordCRUD
-from models import db_session
+from models import Session
+
+
+logger = logging.getLogger(__name__)
+
+
+# Constant fields shared by every postback. Keys are listed in the order the page posts
+# them; the per-request values are filled in by JamabandiDataExtractor._form_data.
+_BASE_FORM = {
+    '__EVENTTARGET': '',
+    '__EVENTARGUMENT': '',
+    '__LASTFOCUS': '',
+    '__VIEWSTATE': '',
+    '__VIEWSTATEGENERATOR': '',
+    '__SCROLLPOSITIONX': '0',
+    '__SCROLLPOSITIONY': '0',
+    '__VIEWSTATEENCRYPTED': '',
+    '__EVENTVALIDATION': '',
+    'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+}
+
+# Postback argument of a nakal row link, e.g. "0" in __doPostBack('...$GridView1','Select$0')
+_NAKAL_ID_RE = re.compile(r"\$([^$']+)'\)")
+
+# Postback steps of the nakal form: name -> (event target, label of the dropdown the
+# response fills). Step names double as the field reported when that dropdown is empty.
+_STEPS = {
+    'districts': ('ctl00$ContentPlaceHolder1$RdobtnKhasra', 'Select District'),
+    'sub-districts': ('ctl00$ContentPlaceHolder1$ddldname', 'Select Tehsil/ Sub-Tehsil'),
+    'villeges': ('ctl00$ContentPlaceHolder1$ddltname', 'Select Village'),
+    'years': ('ctl00$ContentPlaceHolder1$ddlvname', 'Jamabandi Year'),
+    'khasras': ('ctl00$ContentPlaceHolder1$ddlPeriod', 'Khasra'),
+    'nakals': ('ctl00$ContentPlaceHolder1$ddlkhasra', None),
+    'select_nakal': ('ctl00$ContentPlaceHolder1$GridView1', None),
+}
+
+# Size of the chunks a streamed response body is fed to the parser in
+_STREAM_CHUNK_SIZE = 8192
+
+# Size of the chunks the nakal page is downloaded, saved and parsed in
+_DOWNLOAD_CHUNK_SIZE = 65536
+
+
+def _parse_html_stream(response: requests.Response, file=None):
+    """
+    Parse a streamed HTML response body into an lxml tree as it arrives, copying every
+    chunk to the binary file if one is given.
+
+    Jamabandi pages are served as UTF-8; feeding the raw bytes with a fixed encoding
+    skips the decode to str that response.text would do, and the body is never held
+    in memory as a whole. An empty body gives None.
+    """
+    parser = lxml.html.HTMLParser(encoding='utf-8')
+    for chunk in response.iter_content(_DOWNLOAD_CHUNK_SIZE):
+        if file is not None:
+            file.write(chunk)
+        parser.feed(chunk)
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        # lxml has no tree for a document without elements
+        return None
+
+
+def _element_text(tree, element_id: str) -> str|None:
+    """
+    Return the text of the element with the given id, or None if there is no such element.
+    """
+    if tree is None:
+        return None
+    element = tree.get_element_by_id(element_id, None)
+    return element.text if element is not None else None
+
+
+class _FormTarget:
+    """
+    lxml parser target that collects only what a form step reads from its response.
+
+    Gathers the hidden ASP.NET inputs, the unselected options of the dropdown whose label
+    contains `label`, and the rows of the nakal grid, without building a document tree.
+    """
+
+    def __init__(self, label: str|None=None) -> None:
+        self.label = label
+        self.fields = {}            # Hidden "__*" input name -> value
+        self.options = []           # (text, value) of the labelled dropdown's unselected options
+        self.rows = []              # (first link href, cell texts) of the nakal grid rows
+        self._label_text = None     # Text of the <label> being read
+        self._label_matched = False # A matching label was seen in the current <div>
+        self._in_select = False     # Inside the labelled <select>
+        self._option = None         # (text parts, value) of the <option> being read
+        self.select_done = False    # The labelled dropdown has been read to its end
+        self.grid_done = False      # The nakal grid has been read to its end
+        self._grid_depth = 0        # Table nesting level inside the nakal grid
+        self._grid_open = []        # (tag, row) of the open elements inside the nakal grid
+        self._grid_rows = []        # [position, href, cells] of the grid rows read so far
+        self._row_count = 0         # Number of <tr> started inside the nakal grid
+        self._cell_text = None      # Text parts of the cell being read, up to its first child element
+
+    def _grid_start(self, tag: str, attrib: dict) -> None:
+        """
+        Tracks an element inside the nakal grid, reading rows like //tr[./td] with their
+        td/a link and the text of their td cells.
+        """
+        # Like lxml's element.text, a cell's text stops at its first child element
+        self._cell_text = None
+        parent_tag, parent_row = self._grid_open[-1] if self._grid_open else (None, None)
+        row = None
+        if tag == 'table':
+            self._grid_depth += 1
+        elif tag == 'tr':
+            row = [self._row_count, None, []]
+            self._row_count += 1
+        elif tag == 'td' and parent_tag == 'tr':
+            row = parent_row
+            self._cell_text = []
+            row[2].append(self._cell_text)
+        elif tag == 'a' and parent_tag == 'td' and parent_row is not None and parent_row[1] is None:
+            parent_row[1] = attrib.get('href')
+        self._grid_open.append((tag, row))
+
+    def _grid_end(self) -> None:
+        tag, row = self._grid_open.pop()
+        self._cell_text = None
+        if tag == 'tr' and row[2]:
+            self._grid_rows.append(row)
+        elif tag == 'table':
+            self._grid_depth -= 1
+            if not self._grid_depth:
+                # Rows end inside out, list them in document order like the XPath did
+                self._grid_rows.sort()
+                self.rows.extend((href, [''.join(cell) or None for cell in cells])
+                                 for _, href, cells in self._grid_rows)
+                self._grid_rows = []
+                self.grid_done = True
+
+    def start(self, tag: str, attrib: dict) -> None:
+        if self._grid_depth or (tag == 'table' and 'GridView' in attrib.get('id', '')):
+            self._grid_start(tag, attrib)
+        if tag == 'input':
+            name = attrib.get('name', '')
+            if name.startswith('__'):
+                self.fields[name] = attrib.get('value')
+        elif tag == 'label':
+            self._label_text = []
+        elif tag == 'select':
+            self._in_select = self._label_matched
+        elif tag == 'option':
+            if self._in_select and 'selected' not in attrib:
+                self._option = ([], attrib.get('value'))
+
+    def data(self, text: str) -> None:
+        if self._label_text is not None:
+            self._label_text.append(text)
+        if self._option is not None:
+            self._option[0].append(text)
+        if self._cell_text is not None:
+            self._cell_text.append(text)
+
+    def end(self, tag: str) -> None:
+        if self._grid_open:
+            self._grid_end()
+        if tag == 'label':
+            if self.label and self.label in ''.join(self._label_text or ()):
+                self._label_matched = True
+            self._label_text = None
+        elif tag == 'div':
+            self._label_matched = False
+        elif tag == 'select':
+            if self._in_select:
+                self.select_done = True
+            self._in_select = False
+        elif tag == 'option':
+            if self._option is not None:
+                text, value = self._option
+                self.options.append((''.join(text) or None, value))
+                self._option = None
+
+    def close(self) -> '_FormTarget':
+        return self
+
+    def complete(self, wait_for_grid: bool=False) -> bool:
+        """
+        Whether the hidden form state and the labelled dropdown (or the grid) have been read.
+        """
+        if '__VIEWSTATE' not in self.fields or '__EVENTVALIDATION' not in self.fields:
+            return False
+        if self.label and not self.select_done:
+            return False
+        return self.grid_done or not wait_for_grid
+
+
+def _parse_form(content: bytes, label: str|None=None) -> _FormTarget:
+    """
+    Parse an HTML response body with a _FormTarget and return the collected form parts.
+    """
+    parser = etree.HTMLParser(target=_FormTarget(label), encoding='utf-8')
+    return etree.fromstring(content, parser)
+
+
+def _parse_form_stream(response: requests.Response, label: str|None=None,
+                       wait_for_grid: bool=False) -> _FormTarget:
+    """
+    Feed a streamed response body to a _FormTarget as it arrives and return the collected form parts.
+
+    Parsing stops as soon as the target is complete; the rest of the body is still read
+    so the connection goes back to the pool instead of being closed.
+    """
+    target = _FormTarget(label)
+    parser = etree.HTMLParser(target=target, encoding='utf-8')
+    chunks = response.iter_content(_STREAM_CHUNK_SIZE)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if target.complete(wait_for_grid):
+            break
+    for _ in chunks:
+        pass
+    try:
+        return parser.close()
+    except etree.XMLSyntaxError:
+        # An empty body has no elements; the step reports the fields it is missing
+        return target
 
 
 class FormFieldNotFoundException(Exception):
-    def __init__(self, missing_fields: list):
-        self.missing_fields = missing_fields
+    def __init__(self, missing_fields: Sequence[str]):
+        self.missing_fields = tuple(missing_fields)
         message = f"Failed to extract essential fields: {', '.join(missing_fields)}."
         super().__init__(message)
 
 
+def _require(*fields: tuple) -> None:
+    """
+    Raise FormFieldNotFoundException naming every (name, value) pair whose value is empty.
+    """
+    missing = [name for name, value in fields if not value]
+    if missing:
+        logger.error("Failed to extract essential form fields from the Jamabandi page.")
+        raise FormFieldNotFoundException(missing)
+
+
 def retry_on_exception(retries=3, delay=5, allowed_exceptions=(Exception,)):
     """
     Decorator to retry a function if an exception occurs.
@@ -39,17 +280,53 @@ def retry_on_exception(retries=3, delay=5, allowed_exceptions=(Exception,)):
                     return func(*args, **kwargs)
                 except allowed_exceptions as e:
                     attempt += 1
-                    print(f"Error: {e}. Retrying {attempt}/{retries}...")
+                    logger.warning("Error: %s. Retrying %d/%d...", e, attempt, retries)
                     err = traceback.format_exc()
                     time.sleep(delay)
-            # If all retries failed, print traceback and exit with the error message
-            print(err)
-            print("All retries failed. Here's the traceback:")
+            # If all retries failed, log the traceback and exit with the error message
+            logger.error("All retries failed. Here's the traceback:\n%s", err)
             sys.exit("Please try again later; something went wrong.")
         return wrapper
     return decorator
 
 
+# How long (in seconds) cached dropdown listings stay valid
+STEP_CACHE_TTL = 3600
+
+# {(method name, *args): (timestamp, result, form state)}
+_STEP_CACHE = {}
+
+
+def clear_step_cache() -> None:
+    """
+    Drop every cached dropdown listing and its form state.
+    """
+    _STEP_CACHE.clear()
+
+
+def cached_step(func):
+    """
+    Decorator caching a dropdown step across extractor instances for STEP_CACHE_TTL seconds.
+
+    District, sub-district and villege listings rarely change, so repeated extractions
+    can skip their POSTs. The hidden form fields returned alongside a listing are cached
+    with it and restored on a hit, so the next step posts the same state it would have
+    received from the server.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        key = (func.__name__, *args, *sorted(kwargs.items()))
+        entry = _STEP_CACHE.get(key)
+        if entry is not None and time.monotonic() - entry[0] < STEP_CACHE_TTL:
+            _, result, self.form_state = entry
+            self.replayed_form_state = True
+            return result
+        result = func(self, *args, **kwargs)
+        _STEP_CACHE[key] = (time.monotonic(), result, self.form_state)
+        return result
+    return wrapper
+
+
 class JamabandiDataExtractor:
     """
     A class to extract land record data from the Jamabandi website.
@@ -67,6 +344,7 @@ class JamabandiDataExtractor:
         'sec-fetch-site': 'none',
         'sec-fetch-user': '?1',
         'priority': 'u=0, i',
+        'connection': 'keep-alive',
     }
 
     # Base URI for Jamabandi
@@ -79,13 +357,61 @@ class JamabandiDataExtractor:
         Sets up a requests session and initializes state variables to store form values.
         """
         self.req_session = requests.Session()  # Create a new session for requests
+        # Every step hits the same host, so keep its connection pooled and alive across
+        # requests. Transient failures are retried by urllib3 at the HTTP layer with
+        # exponential backoff (honouring Retry-After); the ASP.NET postbacks are POSTs,
+        # so they are allowed to be retried as well.
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                        allowed_methods=frozenset(['GET', 'POST']))
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=32, max_retries=retries)
+        self.req_session.mount('https://', adapter)
         self.viewstate = None                 # ViewState hidden field value (for ASP.NET pages)
         self.event_arg = None                 # Event argument hidden field value
         self.event_validation = None          # Event validation hidden field value
         self.viewstate_generator = None       # ViewState generator hidden field value
         self.request_timeout = 40
+        self.replayed_form_state = False      # Whether a cached form state has been restored
+
+    @property
+    def form_state(self) -> tuple:
+        """
+        The hidden form fields posted with the next step, as one restorable tuple.
+        """
+        return (self.viewstate, self.event_arg, self.event_validation, self.viewstate_generator)
+
+    @form_state.setter
+    def form_state(self, state: tuple) -> None:
+        self.viewstate, self.event_arg, self.event_validation, self.viewstate_generator = state
+
+    @contextmanager
+    def with_state(self):
+        """
+        Snapshots the current form state and restores it when the block exits.
+
+        Lets several khasras of a villege be extracted one after another from the same
+        khasra listing, as each khasra's nakal steps move the form state forward.
+        """
+        state = self.form_state
+        try:
+            yield
+        finally:
+            self.form_state = state
+
+    def _form_data(self, event_target: str, event_arg: str|None, fields: dict) -> dict:
+        """
+        Builds the POST data for a postback from the base form, the current form state and the given dropdown fields.
+        """
+        data = _BASE_FORM.copy()
+        data.update({
+            '__EVENTTARGET': event_target,
+            '__EVENTARGUMENT': event_arg,
+            '__VIEWSTATE': self.viewstate,
+            '__VIEWSTATEGENERATOR': self.viewstate_generator,
+            '__EVENTVALIDATION': self.event_validation,
+        })
+        data.update(fields)
+        return data
 
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
     def get_jamabandi_page(self) -> None:
         """
         Fetches the Jamabandi page and extracts form values for state management.
@@ -96,81 +422,80 @@ class JamabandiDataExtractor:
         response = self.req_session.get(self.jamabandi_uri, headers=self.headers, timeout=self.request_timeout)
         response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
 
-        # Create a Selector object from the response text to facilitate XPath queries
-        selector = scrapy.Selector(text=response.text)
+        # Collect the hidden form fields from the response body
+        form = _parse_form(response.content)
 
         # Extract hidden form field values
-        self.viewstate = selector.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        self.event_arg = selector.xpath('//input[@name="__EVENTARGUMENT"]/@value').get()
-        self.event_validation = selector.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-        self.viewstate_generator = selector.xpath('//input[@name="__VIEWSTATEGENERATOR"]/@value').get()
+        self.viewstate = form.fields.get('__VIEWSTATE')
+        self.event_arg = form.fields.get('__EVENTARGUMENT')
+        self.event_validation = form.fields.get('__EVENTVALIDATION')
+        self.viewstate_generator = form.fields.get('__VIEWSTATEGENERATOR')
 
         # Validate if essential fields were extracted
-        if not self.viewstate or not self.viewstate_generator or not self.event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation', 'viewstate_generator'])
+        _require(('viewstate', self.viewstate), ('event_validation', self.event_validation),
+                 ('viewstate_generator', self.viewstate_generator))
 
 
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
-    def get_districts(self) -> dict:
+    def _step(self, step: str, fields: dict, event_arg: str|None=None):
         """
-        Retrieves the list of districts from the Jamabandi page.
-        
-        Sends a POST request with the required form data to get the districts dropdown options.
-        Extracts and returns a dictionary of district names and their corresponding IDs.
-        
+        Posts one step of the form and updates the hidden form state from its response.
+
+        Args:
+            step (str): Name of the step in _STEPS.
+            fields (dict): Dropdown values posted with the step.
+            event_arg (str): Event argument to post instead of the current one.
+
         Returns:
-            dict: A dictionary where keys are district names and values are district IDs.
+            _FormTarget: The parts of the response the step reads its output from.
         """
-        # Prepare data for the POST request to fetch district options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$RdobtnKhasra',
-            '__EVENTARGUMENT': '',
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
-            'ctl00$ContentPlaceHolder1$ddldname': '-1',
-        }
+        if event_arg is None:
+            event_arg = self.event_arg
+        data = self._form_data(_STEPS[step][0], event_arg, fields)
 
-        districts = {}
+        # Send POST request, parsing the body while it is being received
+        with self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data,
+                                   timeout=self.request_timeout, stream=True) as response:
+            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
 
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, 
-                                        data=data, timeout=self.request_timeout)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx and 5xx)
-
-        # Create a Selector object from the response text to facilitate XPath queries
-        selector = scrapy.Selector(text=response.text)
+            # Collect the hidden fields and the step's dropdown (or the nakal grid) from the body
+            form = _parse_form_stream(response, label=_STEPS[step][1], wait_for_grid=step == 'nakals')
 
         # Update state variables with new values from the response
-        viewstate = selector.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = selector.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
+        viewstate = form.fields.get('__VIEWSTATE')
+        event_validation = form.fields.get('__EVENTVALIDATION')
 
         # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
+        _require(('viewstate', viewstate), ('event_validation', event_validation))
+
         self.viewstate = viewstate
         self.event_validation = event_validation
+        return form
+
+    def _step_options(self, step: str, fields: dict, event_arg: str|None=None) -> dict:
+        """
+        Posts one step of the form and returns the options of the dropdown it fills, as {text: value}.
+        """
+        form = self._step(step, fields, event_arg=event_arg)
+        options = {text: value for text, value in form.options}
+        _require((step, options))
+        return options
+
+    @cached_step
+    def get_districts(self) -> dict:
+        """
+        Retrieves the list of districts from the Jamabandi page.
         
-        # Extract district options from the response
-        district_options = selector.xpath('//div[contains(./label/text(), "Select District")]/select/option[not(@selected)]')
-
-        # Create a dictionary of districts
-        districts = {district_option.xpath('./text()').get(): district_option.xpath(
-            './@value').get() for district_option in district_options}
-            
-        if not districts:
-            raise FormFieldNotFoundException(['districts'])
-        return districts
-
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
+        Sends a POST request with the required form data to get the districts dropdown options.
+        Extracts and returns a dictionary of district names and their corresponding IDs.
+        
+        Returns:
+            dict: A dictionary where keys are district names and values are district IDs.
+        """
+        return self._step_options('districts', {
+            'ctl00$ContentPlaceHolder1$ddldname': '-1',
+        }, event_arg='')
+
+    @cached_step
     def get_sub_districts(self, district_id: str) -> dict:
         """
         Retrieves the list of sub-districts (Tehsil/Sub-Tehsil) for a given district.
@@ -184,52 +509,11 @@ class JamabandiDataExtractor:
         Returns:
             dict: A dictionary where keys are sub-district names and values are sub-district IDs.
         """
-        # Prepare data for the POST request to fetch sub-district options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$ddldname',
-            '__EVENTARGUMENT': self.event_arg,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        return self._step_options('sub-districts', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
-        }
-
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
-
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
-
-        # Extract sub-district options from the response
-        sub_district_options = seletor.xpath('//div[contains(./label/text(), "Select Tehsil/ Sub-Tehsil")]/select/option[not(@selected)]')
-        
-        # Create a dictionary of sub-districts
-        sub_districts = {sub_district_option.xpath('./text()').get(): sub_district_option.xpath(
-            './@value').get() for sub_district_option in sub_district_options}
-
-        if not sub_districts:
-            raise FormFieldNotFoundException(['sub-districts'])
-        return sub_districts
+        })
 
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
+    @cached_step
     def get_villeges(self, district_id: str, sub_district_id: str) -> dict:
         """
         Retrieves the list of villages for a given district and sub-district.
@@ -244,53 +528,11 @@ class JamabandiDataExtractor:
         Returns:
             dict: A dictionary where keys are village names and values are village IDs.
         """
-        # Prepare data for the POST request to fetch village options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$ddltname',
-            '__EVENTARGUMENT': self.event_arg,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        return self._step_options('villeges', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
             'ctl00$ContentPlaceHolder1$ddltname': sub_district_id,
-        }
-
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
+        })
 
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
-
-        # Extract village options from the response
-        village_options = seletor.xpath('//div[contains(./label/text(), "Select Village")]/select/option[not(@selected)]')
-        
-        # Create a dictionary of villages
-        villages = {village_option.xpath('./text()').get(): village_option.xpath(
-            './@value').get() for village_option in village_options}
-        
-        if not villages:
-            raise FormFieldNotFoundException(['villeges'])
-        return villages
-
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
     def get_years(self, district_id: str, sub_district_id: str, villege_id: str) -> list:
         """
         Retrieves the list of Jamabandi years for a given district, sub-district, and village.
@@ -306,50 +548,18 @@ class JamabandiDataExtractor:
         Returns:
             list: A list of available Jamabandi years.
         """
-        # Prepare data for the POST request to fetch years options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$ddlvname',
-            '__EVENTARGUMENT': self.event_arg,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        form = self._step('years', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
             'ctl00$ContentPlaceHolder1$ddltname': sub_district_id,
             'ctl00$ContentPlaceHolder1$ddlvname': villege_id,
-        }
-
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
-
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
+        })
 
         # Extract years options from the response
-        years = seletor.xpath('//div[contains(./label/text(), "Jamabandi Year")]/select/option[not(@selected)]/@value').getall()
+        years = [value for _, value in form.options if value is not None]
 
-        if not years:
-            raise FormFieldNotFoundException(['years'])
+        _require(('years', years))
         return years
 
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
     def get_khasras(self, district_id: str, sub_district_id: str, villege_id: str, year: str) -> dict:
         """
         Retrieves the list of Khasra numbers for a given district, sub-district, village, and year.
@@ -366,61 +576,19 @@ class JamabandiDataExtractor:
         Returns:
             dict: A dictionary where keys are Khasra numbers and values are Khasra IDs.
         """
-        # Prepare data for the POST request to fetch Khasra options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$ddlPeriod',
-            '__EVENTARGUMENT': self.event_arg,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        return self._step_options('khasras', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
             'ctl00$ContentPlaceHolder1$ddltname': sub_district_id,
             'ctl00$ContentPlaceHolder1$ddlvname': villege_id,
             'ctl00$ContentPlaceHolder1$ddlPeriod': year,
-        }
-        khasras = {}
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
+        })
 
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
-
-        # Extract Khasra options from the response
-        khasra_options = seletor.xpath('//div[contains(./label/text(), "Khasra")]/select/option[not(@selected)]')
-        
-        # Create a dictionary of Khasras
-        khasras = {khasra_option.xpath('./text()').get(): khasra_option.xpath(
-            './@value').get() for khasra_option in khasra_options}
-        
-        if not khasras:
-            raise FormFieldNotFoundException(['khasras'])
-        return khasras
-
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
     def get_nakals(self, district_id: str, sub_district_id: str, villege_id: str, year: str, khasra_id: str) -> tuple:
         """
         Retrieves the list of Nakals (documents) for a given district, sub-district, village, year, and Khasra number.
 
         Sends a POST request with the district, sub-district, village IDs, year, and Khasra ID to fetch the Nakal options.
-        Extracts and returns a list of Nakal IDs.
+        Extracts and returns a list of Nakal IDs along with the details of each Nakal row.
 
         Args:
             district_id (str): The ID of the district.
@@ -430,67 +598,30 @@ class JamabandiDataExtractor:
             khasra_id (str): The Khasra ID.
 
         Returns:
-            list: A list of Nakal IDs.
+            tuple: A list of Nakal IDs and a list of {'khewat_no', 'khatoni_no'} dicts, one per Nakal ID.
         """
-        # Prepare data for the POST request to fetch Nakal options
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$ddlkhasra',
-            '__EVENTARGUMENT': self.event_arg,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        form = self._step('nakals', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
             'ctl00$ContentPlaceHolder1$ddltname': sub_district_id,
             'ctl00$ContentPlaceHolder1$ddlvname': villege_id,
             'ctl00$ContentPlaceHolder1$ddlPeriod': year,
             'ctl00$ContentPlaceHolder1$ddlkhasra': khasra_id,
-        }
+        })
 
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
-
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
-
-        # Extract Nakal options from the response
-        nakal_table_rows = seletor.xpath('//table[contains(@id, "GridView")]//tr[./td]')
-        
-        # Create a list of Nakal IDs and other related details
+        # Create a list of Nakal IDs and other related details from the grid rows
         nakals = []
-        nakal_detail = {'khewat_no': '', 'khatoni_no': ''}
-        for nakal_table_row in nakal_table_rows:
-            nakal_id = nakal_table_row.xpath('./td/a/@href').get()
-            nakal_id = 'Select$' + nakal_id.split('$')[-1].replace("')", "")
+        nakal_details = []
+        for nakal_href, cells in form.rows:
+            # Pager and other rows without a row select link are not nakals
+            if not nakal_href or "'Select$" not in nakal_href:
+                continue
+            nakal_id = 'Select$' + _NAKAL_ID_RE.search(nakal_href).group(1)
             nakals.append(nakal_id)
+            nakal_details.append({'khewat_no': cells[1], 'khatoni_no': cells[2]})
 
-            khewat_no = nakal_table_row.xpath('./td[2]/text()').get()
-            khatoni_no = nakal_table_row.xpath('./td[3]/text()').get()
-            nakal_detail['khatoni_no'] = khatoni_no
-            nakal_detail['khewat_no'] = khewat_no
-        
-        if not nakals or not nakal_detail:
-            raise FormFieldNotFoundException(['nakals', 'nakal_detail'])
-        return nakals, nakal_detail
+        _require(('nakals', nakals))
+        return nakals, nakal_details
 
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
     def select_nakals(self, district_id: str, sub_district_id: str, villege_id: str, year: str, khasra_id: str, nakal_id: str):
         """
         Selects a specific Nakal (document) for a given district, sub-district, village, year, and Khasra number.
@@ -505,56 +636,27 @@ class JamabandiDataExtractor:
             khasra_id (str): The Khasra ID.
             nakal_id (str): The Nakal ID to select.
         """
-        # Prepare data for the POST request to select Nakal
-        data = {
-            '__EVENTTARGET': 'ctl00$ContentPlaceHolder1$GridView1',
-            '__EVENTARGUMENT': nakal_id,
-            '__LASTFOCUS': '',
-            '__VIEWSTATE': self.viewstate,
-            '__VIEWSTATEGENERATOR': self.viewstate_generator,
-            '__SCROLLPOSITIONX': '0',
-            '__SCROLLPOSITIONY': '0',
-            '__VIEWSTATEENCRYPTED': '',
-            '__EVENTVALIDATION': self.event_validation,
-            'ctl00$ContentPlaceHolder1$a': 'RdobtnKhasra',
+        self._step('select_nakal', {
             'ctl00$ContentPlaceHolder1$ddldname': district_id,
             'ctl00$ContentPlaceHolder1$ddltname': sub_district_id,
             'ctl00$ContentPlaceHolder1$ddlvname': villege_id,
             'ctl00$ContentPlaceHolder1$ddlPeriod': year,
             'ctl00$ContentPlaceHolder1$ddlkhasra': khasra_id,
-        }
-
-        # Send POST request
-        response = self.req_session.post(self.jamabandi_uri, headers=self.headers, data=data)
-        response.raise_for_status()
+        }, event_arg=nakal_id)
 
-        # Create a Selector object from the response text
-        seletor = scrapy.Selector(text=response.text)
-        
-        # Update state variables with new values from the response
-        viewstate = seletor.xpath('//input[@name="__VIEWSTATE"]/@value').get()
-        event_validation = seletor.xpath('//input[@name="__EVENTVALIDATION"]/@value').get()
-
-        # Validate if essential fields were extracted
-        if not viewstate or not event_validation:
-            print("Failed to extract essential form fields from the Jamabandi page.")
-            raise FormFieldNotFoundException(['viewstate', 'event_validation'])
-        
-        self.viewstate = viewstate
-        self.event_validation = event_validation
-
-    @retry_on_exception(retries=3, delay=5, allowed_exceptions=(RequestException, Exception))
-    def get_nakal_html(self, destination_path: Path|None=None) -> str:
+    def get_nakal_html(self, destination_path: Path|None=None):
         """
         Retrieves the HTML content of a Nakal document and saves it to a specified file.
 
-        Sends a GET request to fetch the Nakal HTML content, writes the content to the given file path, and returns the HTML text.
+        Sends a streamed GET request for the Nakal HTML; each chunk is written to the given
+        file path as it arrives and fed to the parser, so the page is saved and parsed
+        in one pass without buffering the whole body.
 
         Args:
             destination_path (Path): The path where the Nakal HTML content will be saved.
 
         Returns:
-            str: The HTML content of the Nakal document.
+            lxml.html.HtmlElement: The parsed Nakal document.
         """
         
         headers = {
@@ -568,124 +670,413 @@ class JamabandiDataExtractor:
             'sec-fetch-mode': 'navigate',
             'sec-fetch-site': 'same-origin',
             'priority': 'u=0, i',
-            'te': 'trailers'
+            'te': 'trailers',
+            'connection': 'keep-alive',
         }
 
         # Send GET request to retrieve Nakal HTML content
-        response = self.req_session.get('https://jamabandi.nic.in/land%20records/Nakal_khewat', headers=headers)
-        response.raise_for_status()
-        
-        if destination_path:
-            destination_path.write_text(response.text)
-        return response.text
+        with self.req_session.get('https://jamabandi.nic.in/land%20records/Nakal_khewat', headers=headers,
+                                  timeout=self.request_timeout, stream=True) as response:
+            response.raise_for_status()
+            if not destination_path:
+                return _parse_html_stream(response)
+            with destination_path.open('wb') as file:
+                return _parse_html_stream(response, file)
+
+
+# Characters that are not allowed (or are path separators) in Windows and POSIX file names
+_FILENAME_TABLE = str.maketrans({char: '-' for char in '/\\:*?"<>|\t\n\r'})
+
+# Length of the readable part of a nakal file name
+_FILENAME_PREFIX_LENGTH = 40
+
+
+def _safe_filename(parts: tuple[str, ...], suffix: str='.html') -> str:
+    """
+    Builds a file name for the given inputs that is safe on every platform.
+
+    The readable prefix is the inputs with reserved characters replaced, cut to
+    _FILENAME_PREFIX_LENGTH characters; a short hash of the raw inputs keeps names of
+    different inputs apart even when their prefixes are the same.
+    """
+    digest = hashlib.blake2b('\0'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+    prefix = '_'.join(parts).translate(_FILENAME_TABLE)[:_FILENAME_PREFIX_LENGTH]
+    return f"{prefix}_{digest}{suffix}"
+
+
+@dataclass(slots=True)
+class NakalDetails:
+    """
+    Details read from the nakal page of a khasra.
+    """
+    villege: str|None
+    hadbast_no: str|None
+    tehsil: str|None
+    district: str|None
+    year: str|None
+
+
+@dataclass(slots=True)
+class KhasraOutput:
+    """
+    Output of extract_data for one khasra.
+
+    to_dict() returns the nested dict layout the output is saved in, with the nakal
+    page details under 'inner_details'.
+    """
+    district_name: str
+    district_code: str
+    tehsil_name: str
+    tehsil_code: str
+    villege_name: str
+    villege_code: str
+    jamabandi_year: str
+    khewat_no: str
+    khatoni_no: str
+    khasra_code: str
+    khasra_no: str
+    inner_details: NakalDetails
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'KhasraOutput':
+        return cls(**{**data, 'inner_details': NakalDetails(**data['inner_details'])})
+
+
+# How long (in seconds) the output saved next to a nakal html file is reused
+OUTPUT_CACHE_TTL = 24 * 60 * 60
 
 
+def _output_cache_path(destination_path: Path) -> Path:
+    """
+    Returns the path of the extraction output saved alongside a nakal html file.
+    """
+    return destination_path.with_suffix('.json')
+
+
+def _read_cached_output(destination_path: Path, inp_khasra_no: str) -> KhasraOutput|None:
+    """
+    Returns the saved output for a nakal html file if it is younger than OUTPUT_CACHE_TTL.
+    """
+    cache_path = _output_cache_path(destination_path)
+    try:
+        if time.time() - cache_path.stat().st_mtime >= OUTPUT_CACHE_TTL:
+            return None
+        output = KhasraOutput.from_dict(json.loads(cache_path.read_bytes()))
+    except (OSError, ValueError, TypeError, KeyError):
+        # Missing, unreadable, half-written or outdated cache files are simply a miss
+        return None
+    return output if output.khasra_no == inp_khasra_no else None
+
+
+@retry_on_exception(retries=3, delay=5, allowed_exceptions=(FormFieldNotFoundException,))
 def extract_data(inp_district_name: str, inp_sub_district_name: str, 
                  inp_villege_name: str, inp_khasra_no: str, 
-                 destination_path: Path|None=None) -> dict:
+                 destination_path: Path|None=None, use_cache: bool=True) -> KhasraOutput|str:
+    """
+    Extrats Land data and return output, or an error message if the inputs are not found
+
+    With a destination_path the output is also saved next to the nakal html file, and a
+    saved output younger than OUTPUT_CACHE_TTL is returned instead of scraping again,
+    unless use_cache is False.
+    """
+    if destination_path is not None and use_cache:
+        output = _read_cached_output(destination_path, inp_khasra_no)
+        if output is not None:
+            logger.info("Using saved output for khasra %s.", inp_khasra_no)
+            return output
+
+    jamabandi_obj, villege = _open_villege(inp_district_name, inp_sub_district_name, inp_villege_name)
+    if isinstance(villege, str):
+        return villege
+    output = _extract_khasra(jamabandi_obj, villege, inp_khasra_no, destination_path=destination_path)
+
+    if destination_path is not None and isinstance(output, KhasraOutput):
+        _output_cache_path(destination_path).write_text(
+            json.dumps(output.to_dict(), ensure_ascii=False), encoding='utf-8')
+    return output
+
+
+def extract_village(inp_district_name: str, inp_sub_district_name: str, inp_villege_name: str, 
+                    inp_khasra_nos: Iterable[str], destination_dir: Path|None=None) -> Iterator[KhasraOutput|str]:
+    """
+    Extracts Land data for several khasras of one villege and yields one output per khasra, in order.
+
+    The page, district, sub-district, villege, year and khasra steps run once. The form
+    state they leave behind is snapshotted and restored before each khasra, so every
+    khasra only costs its own nakal steps.
+
+    Args:
+        inp_district_name (str): Name of the district.
+        inp_sub_district_name (str): Name of the sub-district.
+        inp_villege_name (str): Name of the villege.
+        inp_khasra_nos (Iterable[str]): Khasra numbers to extract.
+        destination_dir (Path): Directory the nakal HTML of every khasra is saved in.
+
+    Yields:
+        KhasraOutput: The extract_data output for each khasra, or the error message if it has none.
+    """
+    if destination_dir is not None:
+        destination_dir.mkdir(parents=True, exist_ok=True)
+    jamabandi_obj, villege = _open_villege(inp_district_name, inp_sub_district_name, inp_villege_name)
+    for inp_khasra_no in inp_khasra_nos:
+        if isinstance(villege, str):
+            yield villege
+            continue
+        destination_path = None
+        if destination_dir is not None:
+            destination_path = destination_dir / _safe_filename(
+                (inp_district_name, inp_sub_district_name, inp_villege_name, inp_khasra_no))
+        with jamabandi_obj.with_state():
+            yield _extract_khasra(jamabandi_obj, villege, inp_khasra_no, destination_path=destination_path)
+
+
+def _open_villege(inp_district_name: str, inp_sub_district_name: str, 
+                  inp_villege_name: str) -> tuple:
     """
-    Extrats Land data and return output
+    Opens a new extractor on the given villege's khasra listing.
+
+    If the server rejects a cached form state, the cache is dropped and every step is
+    fetched again on a fresh extractor.
+
+    Returns:
+        tuple: The extractor and the villege dict from _select_villege (or its error message).
     """
     jamabandi_obj = JamabandiDataExtractor()
-    print("Fetching jamabandi page.")
+    try:
+        return jamabandi_obj, _select_villege(jamabandi_obj, inp_district_name, 
+                                              inp_sub_district_name, inp_villege_name)
+    except (requests.HTTPError, FormFieldNotFoundException):
+        if not jamabandi_obj.replayed_form_state:
+            raise
+        # The server rejected the cached form state; refetch every step
+        logger.warning("Cached form state rejected, refreshing.")
+        clear_step_cache()
+        jamabandi_obj = JamabandiDataExtractor()
+        return jamabandi_obj, _select_villege(jamabandi_obj, inp_district_name, 
+                                              inp_sub_district_name, inp_villege_name)
+
+
+def _select_villege(jamabandi_obj: JamabandiDataExtractor, inp_district_name: str, 
+                    inp_sub_district_name: str, inp_villege_name: str) -> dict|str:
+    """
+    Runs the steps up to the khasra listing of a villege on the given extractor.
+
+    Returns:
+        dict|str: The names, codes, year and khasras of the villege, or an error message.
+    """
+    logger.info("Fetching jamabandi page.")
     jamabandi_obj.get_jamabandi_page()
 
-    print("Getting districts.")
+    logger.info("Getting districts.")
     districts = jamabandi_obj.get_districts()
-    # print(districts)
+    logger.debug("Districts: %r", districts)
     if inp_district_name not in districts:
         return f'District name:{inp_district_name} not found!'
     district_id = districts[inp_district_name]
     
-    print("Getting sub-districts.")
+    logger.info("Getting sub-districts.")
     sub_districts = jamabandi_obj.get_sub_districts(district_id=district_id)
-    # print(sub_districts)
+    logger.debug("Sub-districts: %r", sub_districts)
     if inp_sub_district_name not in sub_districts:
         return f'sub-district/tehsil name:{inp_sub_district_name} not found!'
     sub_district_id = sub_districts[inp_sub_district_name]
 
-    print("Getting villeges.")
+    logger.info("Getting villeges.")
     villeges = jamabandi_obj.get_villeges(district_id=district_id, sub_district_id=sub_district_id)
-    # print(villeges)
+    logger.debug("Villeges: %r", villeges)
     if inp_villege_name not in villeges:
         return f'Villege name:{inp_villege_name} not found!'
     villege_id = villeges[inp_villege_name]
 
-    print("Getting years.")
+    logger.info("Getting years.")
     years = jamabandi_obj.get_years(
         district_id=district_id, 
         sub_district_id=sub_district_id, 
         villege_id=villege_id
         )
-    # print(years)
+    logger.debug("Years: %r", years)
     if not years:
         return f'Year is empty!'
 
-    print("Getting khasras.")
+    logger.info("Getting khasras.")
     khasras = jamabandi_obj.get_khasras(
         district_id=district_id, 
         sub_district_id=sub_district_id, 
         villege_id=villege_id, year=years[0], 
         )
-    # print(khasras)
-    if inp_khasra_no not in khasras:
+    logger.debug("Khasras: %r", khasras)
+
+    return {
+        'district_name': inp_district_name,
+        'district_code': district_id,
+        'tehsil_name': inp_sub_district_name,
+        'tehsil_code': sub_district_id,
+        'villege_name': inp_villege_name,
+        'villege_code': villege_id,
+        'jamabandi_year': years[0],
+        'khasras': khasras,
+    }
+
+
+def _extract_khasra(jamabandi_obj: JamabandiDataExtractor, villege: dict, inp_khasra_no: str, 
+                    destination_path: Path|None=None) -> KhasraOutput|str:
+    """
+    Runs the nakal steps of one khasra of an opened villege and returns the output
+    """
+    district_id = villege['district_code']
+    sub_district_id = villege['tehsil_code']
+    villege_id = villege['villege_code']
+    year = villege['jamabandi_year']
+
+    if inp_khasra_no not in villege['khasras']:
         return f'Khasra number:{inp_khasra_no} not found!'
-    khasra_id = khasras[inp_khasra_no]
+    khasra_id = villege['khasras'][inp_khasra_no]
 
-    print("Getting nakals.")
-    nakals, nakal_detail = jamabandi_obj.get_nakals(
+    logger.info("Getting nakals.")
+    nakals, nakal_details = jamabandi_obj.get_nakals(
         district_id=district_id, 
         sub_district_id=sub_district_id, 
         villege_id=villege_id, 
-        year=years[0], khasra_id=khasra_id
+        year=year, khasra_id=khasra_id
         )
-    # print(nakals)
+    logger.debug("Nakals: %r", nakals)
     if not nakals:
         return f'Nakal is empty!'
 
-    print("Selecing nakal.")
+    logger.info("Selecing nakal.")
     jamabandi_obj.select_nakals(
         district_id=district_id, 
         sub_district_id=sub_district_id, 
         villege_id=villege_id, 
-        year=years[0], khasra_id=khasra_id, 
+        year=year, khasra_id=khasra_id, 
         nakal_id=nakals[0]
         )
     
-    print("Getting nakal html.")
-    nakal_html_response = jamabandi_obj.get_nakal_html(destination_path=destination_path)
-
-    nakal_selector = scrapy.Selector(text=nakal_html_response)
-    nakal_villege = nakal_selector.xpath('//span[@id="lblvill"]/text()').get()
-    nakal_hadbast = nakal_selector.xpath('//span[@id="lblhad"]/text()').get()
-    nakal_tehsil = nakal_selector.xpath('//span[@id="lblteh"]/text()').get()
-    nakal_district = nakal_selector.xpath('//span[@id="lbldis"]/text()').get()
-    nakal_year = nakal_selector.xpath('//span[@id="lblyer"]/text()').get()
+    logger.info("Getting nakal html.")
+    nakal_tree = jamabandi_obj.get_nakal_html(destination_path=destination_path)
+    inner_details = NakalDetails(
+        villege=_element_text(nakal_tree, 'lblvill'),
+        hadbast_no=_element_text(nakal_tree, 'lblhad'),
+        tehsil=_element_text(nakal_tree, 'lblteh'),
+        district=_element_text(nakal_tree, 'lbldis'),
+        year=_element_text(nakal_tree, 'lblyer'),
+        )
     
-    output = {
-        'district_name': inp_district_name,
-        'district_code': district_id,
-        'tehsil_name': inp_sub_district_name,
-        'tehsil_code': sub_district_id,
-        'villege_name': inp_villege_name,
-        'villege_code': villege_id,
-        'jamabandi_year': years[0],
-        'khewat_no': nakal_detail['khewat_no'],
-        'khatoni_no': nakal_detail['khatoni_no'],
-        'khasra_code': khasra_id,
-        'khasra_no': inp_khasra_no,
-        'inner_details': {
-            'villege': nakal_villege,
-            'hadbast_no': nakal_hadbast,
-            'tehsil': nakal_tehsil,
-            'district': nakal_district,
-            'year': nakal_year
-        }
-    }
-    return output
+    return KhasraOutput(
+        district_name=villege['district_name'],
+        district_code=district_id,
+        tehsil_name=villege['tehsil_name'],
+        tehsil_code=sub_district_id,
+        villege_name=villege['villege_name'],
+        villege_code=villege_id,
+        jamabandi_year=year,
+        khewat_no=nakal_details[0]['khewat_no'],
+        khatoni_no=nakal_details[0]['khatoni_no'],
+        khasra_code=khasra_id,
+        khasra_no=inp_khasra_no,
+        inner_details=inner_details,
+        )
+
+
+def extract_many(inputs: list, max_workers: int=5) -> list:
+    """
+    Extracts Land data for many inputs concurrently and returns the outputs in input order.
+
+    Each input is a dict of extract_data keyword arguments. Every extraction runs in a
+    worker thread with its own JamabandiDataExtractor, i.e. its own requests session and
+    form state, so the chains of different inputs overlap their network round trips
+    while the steps of each chain stay in order.
+
+    Args:
+        inputs (list): extract_data keyword arguments, one dict per extraction.
+        max_workers (int): Maximum number of extractions running at the same time.
+
+    An input whose extraction fails (including running out of retries) gets an error
+    message as its output, so the other inputs are still returned.
+
+    Returns:
+        list: The extract_data output for every input.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_extract_or_error, inputs))
+
+
+def _extract_or_error(kwargs: dict) -> KhasraOutput|str:
+    """
+    Runs extract_data and returns the error message instead of raising if it fails.
+    """
+    try:
+        return extract_data(**kwargs)
+    except (Exception, SystemExit) as e:
+        logger.error("Extraction of khasra %s failed: %s", kwargs.get('inp_khasra_no'), e)
+        return f"Khasra number:{kwargs.get('inp_khasra_no')} extraction failed: {e}"
+
+
+# KhasraOutput fields copied as they are into a LandRecord row
+_TOP_KEYS = ('district_name', 'district_code', 'tehsil_name', 'tehsil_code', 'villege_name',
+             'villege_code', 'jamabandi_year', 'khewat_no', 'khatoni_no', 'khasra_code', 'khasra_no')
+# NakalDetails field -> LandRecord column
+_INNER_KEYS = (('villege', 'nakal_villege'), ('hadbast_no', 'nakal_hadbast'), ('tehsil', 'nakal_tehsil'),
+               ('district', 'nakal_district'), ('year', 'nakal_year'))
+_get_top = operator.attrgetter(*_TOP_KEYS)
+_get_inner = operator.attrgetter(*(src for src, _ in _INNER_KEYS))
+
+
+def _record_data(nakal_data: KhasraOutput) -> dict:
+    """
+    Flattens an extract_data output into the columns of a LandRecord row.
+    """
+    data = dict(zip(_TOP_KEYS, _get_top(nakal_data)))
+    data.update(zip((dst for _, dst in _INNER_KEYS), _get_inner(nakal_data.inner_details)))
+    return data
+
+
+@functools.lru_cache(maxsize=4096)
+def _lookup_land_record(district_name: str, tehsil_name: str, villege_name: str, khasra_no: str) -> dict|None:
+    with Session() as session, session.begin():
+        return LandRecordCRUD(session).find_record(
+            district_name=district_name, tehsil_name=tehsil_name,
+            villege_name=villege_name, khasra_no=khasra_no)
+
+
+def lookup_land_record(district_name: str, tehsil_name: str, villege_name: str, khasra_no: str) -> dict|None:
+    """
+    Returns the stored record (as a dict) for a district/tehsil/village/khasra, or None, cached per process.
+
+    Repeated lookups of the same key skip the database. Call lookup_land_record.cache_clear()
+    after saving a record.
+    """
+    record = _lookup_land_record(district_name, tehsil_name, villege_name, khasra_no)
+    # Callers get their own copy, so changing it does not change the cached record
+    return dict(record) if record is not None else None
+
+
+lookup_land_record.cache_clear = _lookup_land_record.cache_clear
 
 
-def get_command_line_arg():
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Returns the command-line parser of main.py, see get_command_line_arg().
+    """
+    parser = argparse.ArgumentParser(description='Process some input parameters.')
+    
+    # Define the arguments
+    parser.add_argument('--district_name', type=str, required=True, help='District name')
+    parser.add_argument('--sub_district_name', type=str, required=True, help='Sub-district name')
+    parser.add_argument('--village_name', type=str, required=True, help='Village name')
+    parser.add_argument('--khasra_no', type=str, required=True, help='Khasra number, or comma-separated Khasra numbers')
+    parser.add_argument('--force_refresh', action='store_true', help='Set to True if force refresh is enabled, to refresh existing data.')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_true', help='Only log warnings and errors')
+    verbosity.add_argument('-v', '--verbose', action='store_true', help='Also log debug output, such as the parsed dropdowns')
+
+    return parser
+
+
+def get_command_line_arg(argv: Sequence[str]|None=None):
     """
     Parse and return command-line arguments for searching LandRecord records.
 
@@ -694,10 +1085,15 @@ def get_command_line_arg():
     --district_name (str): Name of the district (required).
     --sub_district_name (str): Name of the sub-district (required).
     --village_name (str): Name of the village (required).
-    --khasra_no (str): The Khasra number (required).
+    --khasra_no (str): The Khasra number, or several comma-separated Khasra numbers (required).
     --force_refresh (flag): Optional flag to force refresh existing data. If this 
                             flag is provided, it will set the value to True; 
                             otherwise, it defaults to False.
+    -q, --quiet (flag): Only log warnings and errors.
+    -v, --verbose (flag): Also log debug output.
+
+    Args:
+        argv (Sequence[str]): Arguments to parse instead of sys.argv[1:].
 
     Returns:
         argparse.Namespace: An object containing all parsed arguments.
@@ -706,83 +1102,94 @@ def get_command_line_arg():
         python main.py --district_name 'नुह' --sub_district_name 'नगीना' --village_name 'F. pur dehar' --khasra_no '1//17' --force_refresh
                         or
         python main.py --district_name 'नुह' --sub_district_name 'नगीना' --village_name 'F. pur dehar' --khasra_no '1//17'
+                        or
+        python main.py --district_name 'नुह' --sub_district_name 'नगीना' --village_name 'F. pur dehar' --khasra_no '1//17,1//18'
     """
-    parser = argparse.ArgumentParser(description='Process some input parameters.')
-    
-    # Define the arguments
-    parser.add_argument('--district_name', type=str, required=True, help='District name')
-    parser.add_argument('--sub_district_name', type=str, required=True, help='Sub-district name')
-    parser.add_argument('--village_name', type=str, required=True, help='Village name')
-    parser.add_argument('--khasra_no', type=str, required=True, help='Khasra number')
-    parser.add_argument('--force_refresh', action='store_true', help='Set to True if force refresh is enabled, to refresh existing data.')
+    return build_parser().parse_args(argv)
 
-    # Parse the arguments
-    args = parser.parse_args()
-    
-    # Access the arguments
-    print('>>>>>>>>>>>>>>>>>>>>> Inserted Inputs <<<<<<<<<<<<<<<<<<<<<')
-    print(f'District Name: {args.district_name}')
-    print(f'Sub-district Name: {args.sub_district_name}')
-    print(f'Village Name: {args.village_name}')
-    print(f'Khasra Number: {args.khasra_no}')
-    print(f'Force Refresh: {args.force_refresh}')
-    return args
 
-if __name__ == '__main__':
-    # Setting path for html file
-    path = Path('nakal_html_data')
-    path.mkdir(exist_ok=True, parents=True)
-        
-    # Taking information from commandline
-    args = get_command_line_arg()
-    
-    inp_district_name = args.district_name
-    inp_sub_district_name = args.sub_district_name
-    inp_villege_name = args.village_name
-    inp_khasra_no = args.khasra_no  
-    force_refresh = args.force_refresh
+def run(inp_district_name: str, inp_sub_district_name: str, inp_villege_name: str,
+        inp_khasra_nos: str|Iterable[str], force_refresh: bool=False,
+        html_dir: Path=Path('nakal_html_data')) -> dict:
+    """
+    Returns the land record of every khasra, reading it from the database or extracting it.
 
-    # Setting filename for nakal table data
-    html_path = path.joinpath(f"{inp_district_name}_{inp_sub_district_name}_{inp_villege_name}_{inp_khasra_no.replace('/', '-')}.html")
+    Khasras not in the database (or all of them with force_refresh) are extracted and
+    saved. Nothing is parsed from the command line, so batch drivers can call this directly.
 
-    
-    # Getting data from db
-    nakal_data = LandRecordCRUD(db_session).search_records_by_input_data(
-        district_name=inp_district_name, tehsil_name=inp_sub_district_name,
-        villege_name=inp_villege_name, khasra_no=inp_khasra_no)
-
-    # Scraping data if data not in db or force_refresh is True
-    if not nakal_data or force_refresh:
-        print('>>>>>>>>>>>>>>>>>>>>>>>>> Data extraction started... <<<<<<<<<<<<<<<<<<')
-        nakal_data = extract_data(
-            inp_district_name=inp_district_name, inp_sub_district_name=inp_sub_district_name,
-            inp_villege_name=inp_villege_name, inp_khasra_no=inp_khasra_no, destination_path=html_path
-            )
-
-        if isinstance(nakal_data, dict):
-            # Saving the output
-            data = {
-                'district_name': nakal_data['district_name'],
-                'district_code': nakal_data['district_code'],
-                'tehsil_name': nakal_data['tehsil_name'],
-                'tehsil_code': nakal_data['tehsil_code'],
-                'villege_name': nakal_data['villege_name'],
-                'villege_code': nakal_data['villege_code'],
-                'jamabandi_year': nakal_data['jamabandi_year'],
-                'khewat_no': nakal_data['khewat_no'],
-                'khatoni_no': nakal_data['khatoni_no'],
-                'khasra_code': nakal_data['khasra_code'],
-                'khasra_no': nakal_data['khasra_no'],
-                'nakal_villege': nakal_data['inner_details']['villege'],
-                'nakal_hadbast': nakal_data['inner_details']['hadbast_no'],
-                'nakal_tehsil': nakal_data['inner_details']['tehsil'],
-                'nakal_district': nakal_data['inner_details']['district'],
-                'nakal_year': nakal_data['inner_details']['year']
+    Args:
+        inp_district_name (str): Name of the district.
+        inp_sub_district_name (str): Name of the sub-district.
+        inp_villege_name (str): Name of the villege.
+        inp_khasra_nos (str|Iterable[str]): Khasra numbers, or one comma-separated string of them.
+        force_refresh (bool): Extract and overwrite records that are already stored.
+        html_dir (Path): Directory the nakal html files are saved in.
+
+    Returns:
+        dict: khasra_no -> the record dict, or the error message if it could not be extracted.
+    """
+    if isinstance(inp_khasra_nos, str):
+        inp_khasra_nos = inp_khasra_nos.split(',')
+    inp_khasra_nos = list(dict.fromkeys(
+        khasra_no.strip() for khasra_no in inp_khasra_nos if khasra_no.strip()))
+
+    # Setting path for html file
+    html_dir.mkdir(exist_ok=True, parents=True)
+
+    # Getting data from db; a forced refresh extracts every khasra, so its stored
+    # records are never read
+    results = {}
+    to_extract = []
+    for inp_khasra_no in inp_khasra_nos:
+        results[inp_khasra_no] = None if force_refresh else lookup_land_record(
+            inp_district_name, inp_sub_district_name, inp_villege_name, inp_khasra_no)
+        # Scraping data if data not in db or force_refresh is True
+        if not results[inp_khasra_no]:
+            to_extract.append(inp_khasra_no)
+
+    if to_extract:
+        logger.info('>>>>>>>>>>>>>>>>>>>>>>>>> Data extraction started... <<<<<<<<<<<<<<<<<<')
+        # Khasras are extracted concurrently, each into its own nakal table html file; a
+        # recent saved output is reused unless force_refresh is set
+        extracted = extract_many([
+            {
+                'inp_district_name': inp_district_name, 'inp_sub_district_name': inp_sub_district_name,
+                'inp_villege_name': inp_villege_name, 'inp_khasra_no': inp_khasra_no,
+                'destination_path': html_dir / _safe_filename(
+                    (inp_district_name, inp_sub_district_name, inp_villege_name, inp_khasra_no)),
+                'use_cache': not force_refresh,
             }
-            nakal_data = LandRecordCRUD(db_session).create_record_by_checking_record(
-                district_name=inp_district_name, tehsil_name=inp_sub_district_name,
-                villege_name=inp_villege_name, khasra_no=inp_khasra_no, data=data,
-                force_refresh=force_refresh)
+            for inp_khasra_no in to_extract
+        ])
+
+        # Failed extractions are reported as is; the rest are saved together below
+        records = []
+        for inp_khasra_no, nakal_data in zip(to_extract, extracted):
+            results[inp_khasra_no] = nakal_data
+            if isinstance(nakal_data, KhasraOutput):
+                keys = {'district_name': inp_district_name, 'tehsil_name': inp_sub_district_name,
+                        'villege_name': inp_villege_name, 'khasra_no': inp_khasra_no}
+                records.append((keys, _record_data(nakal_data)))
+
+        if records:
+            # Saving the output with one upsert statement and one commit
+            with Session() as session, session.begin():
+                for record in LandRecordCRUD(session).create_records_bulk(records, force_refresh=force_refresh):
+                    results[record['khasra_no']] = record
+            lookup_land_record.cache_clear()
+    Session.remove()
+    return results
 
-    print("#"*60)
-    print(nakal_data)
+
+if __name__ == '__main__':
+    # Taking information from commandline
+    args = get_command_line_arg()
+    # Progress and results go to stdout; -q keeps only warnings and errors, -v adds debug output
+    log_level = logging.WARNING if args.quiet else logging.DEBUG if args.verbose else logging.INFO
+    logging.basicConfig(level=log_level, format='%(message)s', stream=sys.stdout)
+    logger.info("args=%r", vars(args))
+
+    results = run(args.district_name, args.sub_district_name, args.village_name,
+                  args.khasra_no, force_refresh=args.force_refresh)
+    for nakal_data in results.values():
+        logger.info("%s\n%r", "#"*60, nakal_data)
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Index
+from sqlalchemy import create_engine, event, inspect, Column, String, Integer, DateTime, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.sql import func
 
 
@@ -12,71 +13,162 @@ class LandRecord(Base):
     __tablename__ = 'land_records'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    district_name = Column(String, nullable=False)
-    district_code = Column(String, nullable=False)
-    tehsil_name = Column(String, nullable=False)
-    tehsil_code = Column(String, nullable=False)
-    villege_name = Column(String, nullable=False)
-    villege_code = Column(String, nullable=False)
-    jamabandi_year = Column(String, nullable=False)
-    khewat_no = Column(String, nullable=False)
-    khatoni_no = Column(String, nullable=False)
-    khasra_code = Column(String, nullable=False)
-    khasra_no = Column(String, nullable=False)
+    # Lengths bound the VARCHAR columns on databases that enforce them; SQLite stores TEXT
+    # either way. Codes stay strings: they are the site's zero-padded values (e.g. '02848')
+    # and the leading zeros are part of the code.
+    district_name = Column(String(100), nullable=False)
+    district_code = Column(String(8), nullable=False)
+    tehsil_name = Column(String(100), nullable=False)
+    tehsil_code = Column(String(8), nullable=False)
+    villege_name = Column(String(100), nullable=False)
+    villege_code = Column(String(8), nullable=False)
+    jamabandi_year = Column(String(16), nullable=False)
+    khewat_no = Column(String(32), nullable=False)
+    khatoni_no = Column(String(32), nullable=False)
+    khasra_code = Column(String(16), nullable=False)
+    khasra_no = Column(String(32), nullable=False)
     
-    nakal_villege = Column(String, nullable=False)
-    nakal_hadbast = Column(String, nullable=False)
-    nakal_tehsil = Column(String, nullable=False)
-    nakal_district = Column(String, nullable=False)
-    nakal_year = Column(String, nullable=False)
+    nakal_villege = Column(String(100), nullable=False)
+    nakal_hadbast = Column(String(16), nullable=False)
+    nakal_tehsil = Column(String(100), nullable=False)
+    nakal_district = Column(String(100), nullable=False)
+    nakal_year = Column(String(16), nullable=False)
 
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
-    # Creating composite index to support efficient searching
+    # Creating composite index to support efficient searching. District, tehsil, village
+    # and khasra number identify a record, so a lookup by all four is a single B-tree seek
+    # and its leading columns also serve searches by district/tehsil/village alone.
     __table_args__ = (
-        Index('idx_district_tehsil_village', 'district_name', 'tehsil_name', 'villege_name'),
+        Index('idx_district_tehsil_village_khasra', 'district_name', 'tehsil_name',
+              'villege_name', 'khasra_no', unique=True),
     )
 
-    def to_dict(self):
-        """
-        Convert the LandRecord instance to a dictionary.
-        """
-        def format_datetime(dt):
-            if dt:
-                return dt.strftime('%Y-%m-%d %H:%M:%S')
-            return None
-        return {
-            'id': self.id,
-            'district_name': self.district_name,
-            'district_code': self.district_code,
-            'tehsil_name': self.tehsil_name,
-            'tehsil_code': self.tehsil_code,
-            'villege_name': self.villege_name,
-            'villege_code': self.villege_code,
-            'jamabandi_year': self.jamabandi_year,
-            'khewat_no': self.khewat_no,
-            'khatoni_no': self.khatoni_no,
-            'khasra_code': self.khasra_code,
-            'khasra_no': self.khasra_no,
-            'nakal_villege': self.nakal_villege,
-            'nakal_hadbast': self.nakal_hadbast,
-            'nakal_tehsil': self.nakal_tehsil,
-            'nakal_district': self.nakal_district,
-            'nakal_year': self.nakal_year,
-            'created_at': format_datetime(self.created_at),
-            'updated_at': format_datetime(self.updated_at),
-        }
-
-# Creating sqlalchemy engine and binding it to a database
-engine = create_engine('sqlite:///land_records.db')
+
+def format_datetime(dt):
+    """
+    Format a datetime the way LandRecord.to_dict() returns it ('YYYY-MM-DD HH:MM:SS').
+
+    isoformat() is the C fast path for this layout; strftime would parse its format
+    string on every call.
+    """
+    if dt:
+        return dt.isoformat(sep=' ', timespec='seconds')
+    return None
+
+
+def build_to_dict(model):
+    """
+    Generate a to_dict() method for model from its table columns.
+
+    The method is compiled once into a single dict literal ({'id': self.id, ...}), so
+    converting a row costs no loop over the columns while staying in sync with the schema.
+    """
+    items = []
+    for column in model.__table__.columns:
+        value = f'self.{column.key}'
+        if isinstance(column.type, DateTime):
+            value = f'format_datetime({value})'
+        items.append(f'{column.key!r}: {value}')
+    source = 'def to_dict(self):\n    return {' + ', '.join(items) + '}\n'
+    namespace = {'format_datetime': format_datetime}
+    exec(source, namespace)
+    to_dict = namespace['to_dict']
+    to_dict.__doc__ = f"Convert the {model.__name__} instance to a dictionary."
+    return to_dict
+
+
+LandRecord.to_dict = build_to_dict(LandRecord)
+
+# Creating sqlalchemy engine and binding it to a database. Connections are pooled and
+# reused instead of opening the database file for every session; check_same_thread is
+# off so a pooled connection can be handed to any thread.
+engine = create_engine('sqlite:///land_records.db', poolclass=QueuePool, pool_size=5, max_overflow=10,
+                       pool_pre_ping=True, connect_args={'check_same_thread': False})
+
+
+@event.listens_for(engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune every new SQLite connection: WAL lets readers run alongside a writer and, with
+    synchronous=NORMAL, avoids an fsync per commit; the page cache (64 MiB), mmap (256 MiB)
+    and in-memory temp tables keep repeated lookups off the disk.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA cache_size=-65536')
+    cursor.execute('PRAGMA mmap_size=268435456')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.close()
+
 
 # Create tables in the database
 Base.metadata.create_all(engine)
 
-# Create a session
-Session = sessionmaker(bind=engine)
-db_session = Session()
+
+# GROUP BY of the columns of the unique idx_district_tehsil_village_khasra index
+_KEY_GROUP_BY = 'GROUP BY district_name, tehsil_name, villege_name, khasra_no'
+
+
+class DuplicateRecordsError(RuntimeError):
+    """
+    Raised when the unique index cannot be created because records share a district/tehsil/village/khasra.
+    """
+
+
+def find_duplicate_keys(connection) -> list:
+    """
+    Returns (district, tehsil, villege, khasra, count) of every key held by more than one record.
+    """
+    return connection.exec_driver_sql(
+        'SELECT district_name, tehsil_name, villege_name, khasra_no, COUNT(*) FROM land_records '
+        f'{_KEY_GROUP_BY} HAVING COUNT(*) > 1').fetchall()
+
+
+def drop_duplicate_records(connection) -> int:
+    """
+    Delete all but the newest (highest id) record of every district/tehsil/village/khasra.
+    """
+    return connection.exec_driver_sql(
+        f'DELETE FROM land_records WHERE id NOT IN (SELECT MAX(id) FROM land_records {_KEY_GROUP_BY})'
+    ).rowcount
+
+
+def create_indexes() -> None:
+    """
+    Create the LandRecord indexes missing from the database.
+
+    create_all skips tables that already exist, so older databases are upgraded here.
+    Raises DuplicateRecordsError if they hold records the unique index would reject.
+    """
+    with engine.begin() as connection:
+        existing_indexes = {index['name'] for index in inspect(connection).get_indexes(LandRecord.__tablename__)}
+        for index in LandRecord.__table__.indexes:
+            if index.name in existing_indexes:
+                continue
+            duplicates = find_duplicate_keys(connection) if index.unique else []
+            if duplicates:
+                keys = ', '.join(f'{tuple(key)} x{count}' for *key, count in duplicates[:10])
+                more = f' and {len(duplicates) - 10} more' if len(duplicates) > 10 else ''
+                raise DuplicateRecordsError(
+                    f"Cannot create the unique index {index.name}: {len(duplicates)} district/tehsil/"
+                    f"village/khasra keys have more than one record: {keys}{more}. Run "
+                    f"'python models.py --drop-duplicates' to keep only the newest record of each key.")
+            index.create(connection)
+
+        # The three-column index of older databases is a prefix of the one above; drop it so
+        # inserts don't maintain two indexes
+        connection.exec_driver_sql('DROP INDEX IF EXISTS idx_district_tehsil_village')
+
+
+if __name__ != '__main__':
+    create_indexes()
+
+# Thread-local session registry; open one session per unit of work with
+# `with Session() as session, session.begin(): ...` and call Session.remove() on exit
+Session = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
 
 # Example of how to insert a record
 # new_record = LandRecord(
@@ -99,5 +191,20 @@ db_session = Session()
 #     nakal_year='2022-2023'
 # )
 
-# db_session.add(new_record)
-# db_session.commit()
+# with Session() as session, session.begin():
+#     session.add(new_record)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Create or upgrade the land records database.')
+    parser.add_argument('--drop-duplicates', action='store_true',
+                        help='Delete all but the newest record of every district/tehsil/village/khasra first')
+    args = parser.parse_args()
+
+    if args.drop_duplicates:
+        with engine.begin() as connection:
+            print(f'Deleted {drop_duplicate_records(connection)} duplicate land records.')
+    create_indexes()
+    print('Database is up to date.')
@@ -0,0 +1,183 @@
+"""
+Checks that _FormTarget collects the same form parts as the XPath queries it replaced.
+"""
+from pathlib import Path
+import importlib
+import os
+import sys
+import tempfile
+import unittest
+
+from lxml import etree
+import lxml.html
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+main = None
+
+
+def setUpModule():
+    # models creates land_records.db in the working directory when it is imported
+    global main, _workdir, _cwd
+    _cwd = os.getcwd()
+    _workdir = tempfile.TemporaryDirectory()
+    os.chdir(_workdir.name)
+    main = importlib.import_module('main')
+
+
+def tearDownModule():
+    os.chdir(_cwd)
+    _workdir.cleanup()
+
+
+# The XPath queries the form steps were read with before _FormTarget
+_XP_INPUT_VALUE = etree.XPath('//input[@name=$name]/@value')
+_XP_OPTIONS = etree.XPath('//div[contains(./label/text(), $label)]/select/option[not(@selected)]')
+_XP_NAKAL_ROWS = etree.XPath('//table[contains(@id, "GridView")]//tr[./td]')
+
+_HIDDEN_FIELDS = ('__VIEWSTATE', '__VIEWSTATEGENERATOR', '__EVENTARGUMENT', '__EVENTVALIDATION')
+
+# A dropdown step: the labelled dropdown next to other dropdowns, tables and hidden inputs
+DROPDOWN_PAGE = '''<html><head><title>Nakal</title></head><body>
+<form method="post" action="./NakalRecord" id="form1">
+<div class="aspNetHidden">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="dDwtMTk5/wE=" />
+</div>
+<div class="aspNetHidden">
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+</div>
+<div class="col-md-3"><label for="ddldname">Select District</label>
+<select name="ctl00$ContentPlaceHolder1$ddldname" id="ddldname">
+<option value="-1">--Select--</option>
+<option selected="selected" value="02">नुह</option>
+</select></div>
+<div class="col-md-3"><label for="ddltname">Select Tehsil/ Sub-Tehsil</label>
+<select name="ctl00$ContentPlaceHolder1$ddltname" id="ddltname">
+<option selected="selected" value="-1">--Select--</option>
+<option value="011">नगीना</option>
+<option value="012">नूंह &amp; पुन्हाना</option>
+<option value="013"></option>
+</select></div>
+<div class="col-md-3"><label>Select Village</label>
+<select name="ctl00$ContentPlaceHolder1$ddlvname" id="ddlvname"></select></div>
+<table><tr><td>Not the grid</td></tr></table>
+<div class="aspNetHidden">
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="/wEdAAe+" />
+</div>
+</form></body></html>'''
+
+# The years step: only the option values are read
+YEARS_PAGE = '''<html><body><form>
+<input type="hidden" name="__VIEWSTATE" value="VS" />
+<div><label>Jamabandi Year</label>
+<select name="ctl00$ContentPlaceHolder1$ddlPeriod">
+<option selected="selected" value="-1">--Select--</option>
+<option value="2022-2023">2022-2023</option>
+<option value="2017-2018">2017-2018</option>
+</select></div>
+<input type="hidden" name="__EVENTVALIDATION" value="EV" />
+</form></body></html>'''
+
+# The nakal step: a GridView with a header row, data rows (one with its link wrapped in a
+# <span>, which td/a does not reach) and a nested pager table
+GRID_PAGE = '''<html><body><form>
+<input type="hidden" name="__VIEWSTATE" value="VS" />
+<div><table class="grid" cellspacing="0" rules="all" border="1" id="ctl00_ContentPlaceHolder1_GridView1">
+<tr><th scope="col">&#160;</th><th scope="col">Khewat</th><th scope="col">Khatoni</th></tr>
+<tr><td><a href="javascript:__doPostBack(&#39;ctl00$ContentPlaceHolder1$GridView1&#39;,&#39;Select$0&#39;)">Select</a></td>
+<td>3</td><td>9</td></tr>
+<tr><td><a href="javascript:__doPostBack(&#39;ctl00$ContentPlaceHolder1$GridView1&#39;,&#39;Select$1&#39;)">Select</a></td>
+<td>4/1<b>min</b> rest</td><td></td></tr>
+<tr><td><span><a href="javascript:__doPostBack(&#39;ctl00$ContentPlaceHolder1$GridView1&#39;,&#39;Select$2&#39;)">Select</a></span></td>
+<td> 5 </td><td>11</td></tr>
+<tr><td colspan="3"><table><tr><td>1</td><td><a href="javascript:__doPostBack(&#39;ctl00$ContentPlaceHolder1$GridView1&#39;,&#39;Page$2&#39;)">2</a></td></tr></table></td></tr>
+</table></div>
+<input type="hidden" name="__EVENTVALIDATION" value="EV" />
+</form></body></html>'''
+
+
+def _xpath_fields(tree) -> dict:
+    fields = {}
+    for name in _HIDDEN_FIELDS:
+        values = _XP_INPUT_VALUE(tree, name=name)
+        if values:
+            fields[name] = str(values[0])
+    return fields
+
+
+def _xpath_options(tree, label: str) -> list:
+    return [(option.text, option.get('value')) for option in _XP_OPTIONS(tree, label=label)]
+
+
+def _xpath_rows(tree) -> list:
+    rows = []
+    for row in _XP_NAKAL_ROWS(tree):
+        link = row.find('td/a')
+        rows.append((link.get('href') if link is not None else None,
+                     [cell.text for cell in row.findall('td')]))
+    return rows
+
+
+class _ChunkedResponse:
+    """
+    Stands in for a streamed requests.Response, yielding the body in small chunks.
+    """
+    def __init__(self, content: bytes, chunk_size: int) -> None:
+        self.content = content
+        self.chunk_size = chunk_size
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.content), self.chunk_size):
+            yield self.content[start:start + self.chunk_size]
+
+
+class FormTargetTest(unittest.TestCase):
+
+    def assertMatchesXPath(self, page: str, label: str|None) -> None:
+        content = page.encode('utf-8')
+        tree = lxml.html.fromstring(content, parser=lxml.html.HTMLParser(encoding='utf-8'))
+        form = main._parse_form(content, label)
+        self.assertEqual(
+            {name: value for name, value in form.fields.items() if name in _HIDDEN_FIELDS},
+            _xpath_fields(tree))
+        if label is not None:
+            self.assertEqual(form.options, _xpath_options(tree, label))
+        self.assertEqual(form.rows, _xpath_rows(tree))
+
+    def test_dropdown_steps(self):
+        for label in ('Select District', 'Select Tehsil/ Sub-Tehsil', 'Select Village', None):
+            with self.subTest(label=label):
+                self.assertMatchesXPath(DROPDOWN_PAGE, label)
+
+    def test_dropdown_options(self):
+        form = main._parse_form(DROPDOWN_PAGE.encode('utf-8'), 'Select Tehsil/ Sub-Tehsil')
+        self.assertEqual(form.options, [('नगीना', '011'), ('नूंह & पुन्हाना', '012'), (None, '013')])
+        self.assertEqual(form.rows, [])
+
+    def test_years_step(self):
+        self.assertMatchesXPath(YEARS_PAGE, 'Jamabandi Year')
+        form = main._parse_form(YEARS_PAGE.encode('utf-8'), 'Jamabandi Year')
+        self.assertEqual([value for _, value in form.options], ['2022-2023', '2017-2018'])
+
+    def test_grid_rows(self):
+        self.assertMatchesXPath(GRID_PAGE, None)
+        form = main._parse_form(GRID_PAGE.encode('utf-8'))
+        # The header row has no <td> cells and is skipped
+        self.assertEqual([cells[1:] for _, cells in form.rows[:2]], [['3', '9'], ['4/1', None]])
+
+    def test_stream_matches_whole_body(self):
+        for page, label in ((DROPDOWN_PAGE, 'Select Tehsil/ Sub-Tehsil'),
+                            (YEARS_PAGE, 'Jamabandi Year'), (GRID_PAGE, None), ('', 'Khasra')):
+            content = page.encode('utf-8')
+            whole = main._parse_form(content, label)
+            # Chunks of 7 bytes split tags and multi-byte characters
+            streamed = main._parse_form_stream(_ChunkedResponse(content, 7), label, wait_for_grid=True)
+            with self.subTest(label=label):
+                self.assertEqual((streamed.fields, streamed.options, streamed.rows),
+                                 (whole.fields, whole.options, whole.rows))
+
+
+if __name__ == '__main__':
+    unittest.main()